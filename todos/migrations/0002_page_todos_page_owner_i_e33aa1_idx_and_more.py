@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='page',
+            index=models.Index(fields=['owner', 'is_active', '-created_at'], name='todos_page_owner_i_e33aa1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['page', 'position', '-created_at'], name='todos_todo_page_id_bf208b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['page', 'completed'], name='todos_todo_page_id_f7098f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['page', 'due_date', 'completed'], name='todos_todo_page_id_102fde_idx'),
+        ),
+    ]
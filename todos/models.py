@@ -1,8 +1,18 @@
 # todos/models.py
 from django.db import models
+from django.db.models import Count, Q
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.urls import reverse
+from django.utils.functional import cached_property
+
+# Couleurs associées aux priorités des tâches
+PRIORITY_COLORS = {
+    'low': '#28a745',      # Vert
+    'medium': '#ffc107',   # Jaune
+    'high': '#fd7e14',     # Orange
+    'urgent': '#dc3545',   # Rouge
+}
 
 class Page(models.Model):
     """
@@ -35,6 +45,10 @@ class Page(models.Model):
         verbose_name_plural = "Pages"
         # Un utilisateur ne peut pas avoir deux pages avec le même titre
         unique_together = ['owner', 'title']
+        indexes = [
+            # Listes de pages actives d'un utilisateur (page_list, dashboard)
+            models.Index(fields=['owner', 'is_active', '-created_at']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.owner.username}"
@@ -98,6 +112,13 @@ class Todo(models.Model):
         ordering = ['position', '-created_at']
         verbose_name = "Tâche"
         verbose_name_plural = "Tâches"
+        indexes = [
+            # Tri par défaut des todos d'une page
+            models.Index(fields=['page', 'position', '-created_at']),
+            # Filtres de statut et de retard dans page_detail
+            models.Index(fields=['page', 'completed']),
+            models.Index(fields=['page', 'due_date', 'completed']),
+        ]
 
     def __str__(self):
         status = "✓" if self.completed else "○"
@@ -114,6 +135,24 @@ class Todo(models.Model):
             self.completed_at = None
         super().save(*args, **kwargs)
     
+    @classmethod
+    def bulk_add(cls, page, rows, batch_size=1000):
+        """
+        Crée plusieurs todos dans une page en quelques INSERT groupés
+        `rows` est une liste de dictionnaires de champs (title, priority, ...)
+        """
+        now = timezone.now()
+        todos = []
+        for row in rows:
+            todo = cls(page=page, **row)
+            # bulk_create n'appelle pas save() : on reproduit sa logique ici
+            if todo.completed and not todo.completed_at:
+                todo.completed_at = now
+            elif not todo.completed:
+                todo.completed_at = None
+            todos.append(todo)
+        return cls.objects.bulk_create(todos, batch_size=batch_size)
+    
     @property
     def is_overdue(self):
         """Vérifie si la tâche est en retard"""
@@ -124,13 +163,7 @@ class Todo(models.Model):
     @property
     def priority_color(self):
         """Retourne une couleur basée sur la priorité"""
-        colors = {
-            'low': '#28a745',      # Vert
-            'medium': '#ffc107',   # Jaune
-            'high': '#fd7e14',     # Orange
-            'urgent': '#dc3545',   # Rouge
-        }
-        return colors.get(self.priority, '#6c757d')
+        return PRIORITY_COLORS.get(self.priority, '#6c757d')
 
 
 class UserProfile(models.Model):
@@ -170,17 +203,27 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"Profil de {self.user.username}"
 
+    @cached_property
+    def stats(self):
+        """Retourne les statistiques de l'utilisateur en une seule requête"""
+        # Les todos des pages supprimées (soft delete) ne sont pas comptées
+        return Page.objects.filter(owner_id=self.user_id, is_active=True).aggregate(
+            total_pages=Count('id', distinct=True),
+            total_todos=Count('todos'),
+            completed_todos=Count('todos', filter=Q(todos__completed=True)),
+        )
+
     def get_total_pages(self):
         """Retourne le nombre total de pages de l'utilisateur"""
-        return self.user.pages.filter(is_active=True).count()
+        return self.stats['total_pages']
     
     def get_total_todos(self):
         """Retourne le nombre total de todos de l'utilisateur"""
-        return Todo.objects.filter(page__owner=self.user).count()
+        return self.stats['total_todos']
     
     def get_completed_todos(self):
         """Retourne le nombre de todos complétées de l'utilisateur"""
-        return Todo.objects.filter(page__owner=self.user, completed=True).count()
+        return self.stats['completed_todos']
 
 
 # Signal pour créer automatiquement un profil utilisateur
@@ -192,9 +235,3 @@ def create_user_profile(sender, instance, created, **kwargs):
     """Crée automatiquement un profil quand un utilisateur est créé"""
     if created:
         UserProfile.objects.create(user=instance)
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Sauvegarde le profil quand l'utilisateur est sauvegardé"""
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
@@ -1,3 +1,84 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Page, Todo
+
+
+class TodoToggleTests(TestCase):
+    """Contrôle d'accès de la bascule AJAX d'un todo"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='secret')
+        self.other = User.objects.create_user('other', password='secret')
+        self.page = Page.objects.create(title='Maison', owner=self.owner)
+        self.todo = Todo.objects.create(title='Vaisselle', page=self.page)
+
+    def toggle(self, todo):
+        return self.client.post(reverse('todo_toggle', args=[todo.id]))
+
+    def test_owner_can_toggle(self):
+        self.client.login(username='owner', password='secret')
+        response = self.toggle(self.todo)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['completed'])
+        self.todo.refresh_from_db()
+        self.assertTrue(self.todo.completed)
+        self.assertIsNotNone(self.todo.completed_at)
+
+    def test_toggle_other_users_todo_returns_404(self):
+        self.client.login(username='other', password='secret')
+        response = self.toggle(self.todo)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()['success'])
+        self.todo.refresh_from_db()
+        self.assertFalse(self.todo.completed)
+        self.assertIsNone(self.todo.completed_at)
+
+    def test_toggle_todo_on_soft_deleted_page_returns_404(self):
+        self.client.login(username='owner', password='secret')
+        self.client.post(reverse('page_delete', args=[self.page.id]))
+        response = self.toggle(self.todo)
+        self.assertEqual(response.status_code, 404)
+        self.todo.refresh_from_db()
+        self.assertFalse(self.todo.completed)
+
+
+# Gabarit minimal : seul le contexte passé par la vue est vérifié
+@override_settings(TEMPLATES=[{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {
+        'loaders': [('django.template.loaders.locmem.Loader', {'todos/dashboard.html': ''})],
+    },
+}])
+class SoftDeletedPageStatsTests(TestCase):
+    """Les pages supprimées (soft delete) sont exclues des statistiques"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='secret')
+        active = Page.objects.create(title='Active', owner=self.user)
+        Todo.objects.create(title='A1', page=active, completed=True)
+        Todo.objects.create(title='A2', page=active)
+        deleted = Page.objects.create(title='Supprimée', owner=self.user)
+        Todo.objects.create(title='S1', page=deleted, completed=True)
+        Todo.objects.create(title='S2', page=deleted)
+        Todo.objects.create(title='S3', page=deleted)
+        self.client.login(username='owner', password='secret')
+        self.client.post(reverse('page_delete', args=[deleted.id]))
+
+    def test_dashboard_stats_exclude_soft_deleted_pages(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['stats'], {
+            'total_pages': 1,
+            'total_todos': 2,
+            'completed_todos': 1,
+            'pending_todos': 1,
+        })
+        self.assertEqual([page.title for page in response.context['recent_pages']], ['Active'])
+
+    def test_profile_stats_exclude_soft_deleted_pages(self):
+        self.assertEqual(self.user.profile.stats, {
+            'total_pages': 1,
+            'total_todos': 2,
+            'completed_todos': 1,
+        })
@@ -4,16 +4,46 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse
 from django.views.decorators.http import require_POST
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from .models import Page, Todo, UserProfile
-from django.db.models import Q
-import json
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, DateTimeField, Prefetch, Q, Value, When
+import orjson
+
+def json_response(data, status=200):
+    """Réponse JSON sérialisée avec orjson (plus rapide que JsonResponse)"""
+    return HttpResponse(orjson.dumps(data), content_type='application/json', status=status)
+
+def parse_due_date(value):
+    """
+    Convertit la date d'échéance du formulaire en datetime (une seule fois)
+    Lève ValueError si la valeur fournie n'est pas une date valide
+    """
+    if not value:
+        return None
+    due_date = parse_datetime(value)
+    if due_date is None:
+        raise ValueError(value)
+    if timezone.is_naive(due_date):
+        due_date = timezone.make_aware(due_date)
+    return due_date
+
+def save_changed_fields(instance, values, extra_fields=()):
+    """Affecte les valeurs et n'écrit que les colonnes réellement modifiées"""
+    changed = [field for field, value in values.items() if getattr(instance, field) != value]
+    if not changed:
+        return
+    for field in changed:
+        setattr(instance, field, values[field])
+    instance.save(update_fields=changed + list(extra_fields))
 
 # ===== VUES D'AUTHENTIFICATION =====
 
+@transaction.atomic
 def register_view(request):
     """Vue pour l'inscription des utilisateurs"""
     if request.method == 'POST':
@@ -56,24 +86,31 @@ def dashboard(request):
     """Page d'accueil après connexion - tableau de bord"""
     user_pages = Page.objects.filter(owner=request.user, is_active=True)
     
-    # Statistiques
+    # Statistiques (une seule requête d'agrégation pour les todos)
     total_pages = user_pages.count()
-    total_todos = Todo.objects.filter(page__owner=request.user).count()
-    completed_todos = Todo.objects.filter(page__owner=request.user, completed=True).count()
-    pending_todos = total_todos - completed_todos
+    todo_stats = Todo.objects.filter(page__owner=request.user, page__is_active=True).aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(completed=True)),
+    )
+    pending_todos = todo_stats['total'] - todo_stats['completed']
     
-    # Pages récentes avec leurs todos
-    recent_pages = user_pages[:5]
-    for page in recent_pages:
-        page.recent_todos = page.todos.all()[:3]
+    # Pages récentes avec leurs 3 premiers todos (préchargés en une requête,
+    # le découpage par page est fait en SQL)
+    recent_pages = user_pages.annotate(todo_count=Count('todos')).order_by('-created_at')[:5].prefetch_related(
+        Prefetch(
+            'todos',
+            queryset=Todo.objects.order_by('position', '-created_at').only('id', 'page', 'title', 'completed')[:3],
+            to_attr='recent_todos',
+        )
+    )
     
     context = {
         'user_pages': user_pages,
         'recent_pages': recent_pages,
         'stats': {
             'total_pages': total_pages,
-            'total_todos': total_todos,
-            'completed_todos': completed_todos,
+            'total_todos': todo_stats['total'],
+            'completed_todos': todo_stats['completed'],
             'pending_todos': pending_todos,
         }
     }
@@ -84,7 +121,13 @@ def dashboard(request):
 @login_required
 def page_list(request):
     """Liste de toutes les pages de l'utilisateur"""
-    pages = Page.objects.filter(owner=request.user, is_active=True)
+    # Colonnes limitées et compteurs calculés par la base en une requête
+    pages = Page.objects.filter(owner=request.user, is_active=True).only(
+        'id', 'title', 'color', 'updated_at'
+    ).annotate(
+        todo_count=Count('todos'),
+        done_count=Count('todos', filter=Q(todos__completed=True)),
+    ).order_by('-created_at')
     return render(request, 'todos/pages/list.html', {'pages': pages})
 
 @login_required
@@ -96,6 +139,10 @@ def page_create(request):
         color = request.POST.get('color', '#007bff')
         
         if title:
+            # Vérification préalable pour éviter un INSERT suivi d'un rollback
+            if Page.objects.filter(owner=request.user, title=title).exists():
+                messages.error(request, 'Une page avec ce nom existe déjà.')
+                return render(request, 'todos/pages/create.html')
             try:
                 page = Page.objects.create(
                     title=title,
@@ -122,30 +169,33 @@ def page_detail(request, page_id):
     filter_priority = request.GET.get('priority', 'all')
     search_query = request.GET.get('search', '')
     
-    # Récupérer tous les todos de la page
-    todos = page.todos.all()
-    
-    # Appliquer les filtres
-    if filter_status == 'completed':
-        todos = todos.filter(completed=True)
-    elif filter_status == 'pending':
-        todos = todos.filter(completed=False)
+    # Construire les filtres puis les appliquer en un seul .filter()
+    filters = Q()
+    if filter_status in ('completed', 'pending'):
+        filters &= Q(completed=(filter_status == 'completed'))
     
     if filter_priority != 'all':
-        todos = todos.filter(priority=filter_priority)
+        filters &= Q(priority=filter_priority)
     
     if search_query:
-        todos = todos.filter(
-            Q(title__icontains=search_query) | 
-            Q(description__icontains=search_query)
-        )
+        filters &= Q(title__icontains=search_query) | Q(description__icontains=search_query)
     
-    # Statistiques de la page
+    todos = page.todos.filter(filters).only(
+        'id', 'page', 'title', 'completed', 'priority', 'due_date', 'position'
+    )
+    
+    # Statistiques de la page (une seule requête d'agrégation)
+    stats = page.todos.aggregate(
+        total_count=Count('id'),
+        completed_count=Count('id', filter=Q(completed=True)),
+        pending_count=Count('id', filter=Q(completed=False)),
+        overdue_count=Count('id', filter=Q(due_date__lt=timezone.now(), completed=False)),
+    )
     page_stats = {
-        'total': page.todos.count(),
-        'completed': page.todos.filter(completed=True).count(),
-        'pending': page.todos.filter(completed=False).count(),
-        'overdue': page.todos.filter(due_date__lt=timezone.now(), completed=False).count(),
+        'total': stats['total_count'],
+        'completed': stats['completed_count'],
+        'pending': stats['pending_count'],
+        'overdue': stats['overdue_count'],
     }
     
     context = {
@@ -186,14 +236,17 @@ def page_edit(request, page_id):
 @login_required
 def page_delete(request, page_id):
     """Supprimer une page (soft delete)"""
-    page = get_object_or_404(Page, id=page_id, owner=request.user, is_active=True)
-    
     if request.method == 'POST':
-        page.is_active = False
-        page.save()
-        messages.success(request, f'Page "{page.title}" supprimée avec succès!')
+        # Un seul UPDATE ciblé, sans charger la page au préalable
+        updated = Page.objects.filter(
+            id=page_id, owner=request.user, is_active=True
+        ).update(is_active=False, updated_at=timezone.now())
+        if not updated:
+            raise Http404
+        messages.success(request, 'Page supprimée avec succès!')
         return redirect('dashboard')
     
+    page = get_object_or_404(Page, id=page_id, owner=request.user, is_active=True)
     return render(request, 'todos/pages/delete.html', {'page': page})
 
 # ===== VUES POUR LES TODOS =====
@@ -210,12 +263,17 @@ def todo_create(request, page_id):
         due_date = request.POST.get('due_date')
         
         if title:
+            try:
+                due_date = parse_due_date(due_date)
+            except ValueError:
+                messages.error(request, 'La date d\'échéance est invalide.')
+                return render(request, 'todos/todos/create.html', {'page': page})
             todo = Todo.objects.create(
                 title=title,
                 description=description,
                 priority=priority,
                 page=page,
-                due_date=due_date if due_date else None
+                due_date=due_date
             )
             messages.success(request, f'Tâche "{title}" créée avec succès!')
             return redirect('page_detail', page_id=page.id)
@@ -227,7 +285,7 @@ def todo_create(request, page_id):
 @login_required
 def todo_edit(request, todo_id):
     """Modifier un todo"""
-    todo = get_object_or_404(Todo, id=todo_id, page__owner=request.user)
+    todo = get_object_or_404(Todo.objects.select_related('page'), id=todo_id, page__owner=request.user, page__is_active=True)
     
     if request.method == 'POST':
         title = request.POST.get('title')
@@ -236,10 +294,15 @@ def todo_edit(request, todo_id):
         due_date = request.POST.get('due_date')
         
         if title:
+            try:
+                due_date = parse_due_date(due_date)
+            except ValueError:
+                messages.error(request, 'La date d\'échéance est invalide.')
+                return render(request, 'todos/todos/edit.html', {'todo': todo})
             todo.title = title
             todo.description = description
             todo.priority = priority
-            todo.due_date = due_date if due_date else None
+            todo.due_date = due_date
             todo.save()
             messages.success(request, f'Tâche "{title}" modifiée avec succès!')
             return redirect('page_detail', page_id=todo.page.id)
@@ -251,14 +314,13 @@ def todo_edit(request, todo_id):
 @login_required
 def todo_delete(request, todo_id):
     """Supprimer un todo"""
-    todo = get_object_or_404(Todo, id=todo_id, page__owner=request.user)
-    page_id = todo.page.id
+    todo = get_object_or_404(Todo.objects.select_related('page'), id=todo_id, page__owner=request.user, page__is_active=True)
     
     if request.method == 'POST':
         todo_title = todo.title
         todo.delete()
         messages.success(request, f'Tâche "{todo_title}" supprimée avec succès!')
-        return redirect('page_detail', page_id=page_id)
+        return redirect('page_detail', page_id=todo.page_id)
     
     return render(request, 'todos/todos/delete.html', {'todo': todo})
 
@@ -266,14 +328,38 @@ def todo_delete(request, todo_id):
 @require_POST
 def todo_toggle(request, todo_id):
     """Marquer un todo comme complété/non complété (AJAX)"""
-    todo = get_object_or_404(Todo, id=todo_id, page__owner=request.user)
-    todo.completed = not todo.completed
-    todo.save()
+    # Bascule atomique en un seul UPDATE (pas de lecture préalable ni de course
+    # entre deux requêtes concurrentes)
+    now = timezone.now()
+    # Le contrôle du propriétaire se fait dans le WHERE de l'UPDATE lui-même
+    updated = Todo.objects.filter(
+        pk=todo_id, page__owner_id=request.user.id, page__is_active=True
+    ).update(
+        # completed_at est placé avant completed : MySQL applique les SET de
+        # gauche à droite et lirait sinon la valeur déjà basculée
+        completed_at=Case(
+            When(completed=True, then=Value(None)),
+            default=Value(now),
+            output_field=DateTimeField(),
+        ),
+        completed=Case(
+            When(completed=True, then=Value(False)),
+            default=Value(True),
+            output_field=BooleanField(),
+        ),
+        updated_at=now,
+    )
+    # La tâche peut avoir été supprimée entre l'UPDATE et la relecture
+    completed = None
+    if updated:
+        completed = Todo.objects.values_list('completed', flat=True).filter(pk=todo_id).first()
+    if completed is None:
+        return json_response({'success': False, 'error': 'Tâche introuvable'}, status=404)
     
-    return JsonResponse({
+    return json_response({
         'success': True,
-        'completed': todo.completed,
-        'message': f'Tâche {"complétée" if todo.completed else "marquée comme non complétée"}'
+        'completed': completed,
+        'message': f'Tâche {"complétée" if completed else "marquée comme non complétée"}'
     })
 
 # ===== VUES AJAX =====
@@ -282,45 +368,51 @@ def todo_toggle(request, todo_id):
 def quick_add_todo(request):
     """Ajouter rapidement un todo via AJAX"""
     if request.method == 'POST':
-        data = json.loads(request.body)
+        data = orjson.loads(request.body)
         page_id = data.get('page_id')
         title = data.get('title')
         
         if page_id and title:
-            page = get_object_or_404(Page, id=page_id, owner=request.user, is_active=True)
+            page = get_object_or_404(Page.objects.only('id'), id=page_id, owner=request.user, is_active=True)
+            priority = 'medium'
             todo = Todo.objects.create(
                 title=title,
+                priority=priority,
                 page=page
             )
-            return JsonResponse({
+            # Réponse construite à partir des valeurs connues, seul l'id vient de la base
+            return json_response({
                 'success': True,
                 'todo': {
-                    'id': todo.id,
-                    'title': todo.title,
-                    'completed': todo.completed,
-                    'priority': todo.priority
+                    'id': todo.pk,
+                    'title': title,
+                    'completed': False,
+                    'priority': priority
                 }
             })
     
-    return JsonResponse({'success': False, 'error': 'Données invalides'})
+    return json_response({'success': False, 'error': 'Données invalides'})
 
 # ===== VUES DE PROFIL =====
 
 @login_required
+@transaction.atomic
 def profile_view(request):
     """Afficher et modifier le profil utilisateur"""
     profile, created = UserProfile.objects.get_or_create(user=request.user)
     
     if request.method == 'POST':
-        request.user.first_name = request.POST.get('first_name', '')
-        request.user.last_name = request.POST.get('last_name', '')
-        request.user.email = request.POST.get('email', '')
-        request.user.save()
+        save_changed_fields(request.user, {
+            'first_name': request.POST.get('first_name', ''),
+            'last_name': request.POST.get('last_name', ''),
+            'email': request.POST.get('email', ''),
+        })
         
-        profile.bio = request.POST.get('bio', '')
-        profile.theme = request.POST.get('theme', 'light')
-        profile.notifications_enabled = 'notifications_enabled' in request.POST
-        profile.save()
+        save_changed_fields(profile, {
+            'bio': request.POST.get('bio', ''),
+            'theme': request.POST.get('theme', 'light'),
+            'notifications_enabled': 'notifications_enabled' in request.POST,
+        }, extra_fields=['updated_at'])
         
         messages.success(request, 'Profil mis à jour avec succès!')
         return redirect('profile')
@@ -343,12 +435,16 @@ def search_view(request):
             owner=request.user,
             is_active=True,
             title__icontains=query
-        )[:10]
+        ).only('id', 'title', 'color', 'description')[:10]
         
         results['todos'] = Todo.objects.filter(
             page__owner=request.user,
+            page__is_active=True,
             title__icontains=query
-        ).select_related('page')[:20]
+        ).select_related('page').only(
+            'id', 'title', 'completed', 'priority',
+            'page__id', 'page__title', 'page__color'
+        )[:20]
     
     context = {
         'query': query,